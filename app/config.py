@@ -6,11 +6,13 @@ class Settings:
     base_iri: str
     data_ttl_path: str
     default_language: str
+    watch_data_file: bool
 
     def __init__(self) -> None:
         self.base_iri = os.getenv("BASE_IRI", "https://vocabulary.montessoriglossary.org/")
         self.data_ttl_path = os.getenv("DATA_TTL_PATH", os.path.abspath(os.path.join(os.getcwd(), "data", "vocabulary.ttl")))
         self.default_language = os.getenv("DEFAULT_LANGUAGE", "en")
+        self.watch_data_file = os.getenv("WATCH_DATA_FILE", "true").lower() in {"1", "true", "yes"}
 
 
 @lru_cache(maxsize=1)
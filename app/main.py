@@ -1,26 +1,74 @@
 from __future__ import annotations
 
-from typing import Optional
-from urllib.parse import unquote
+import asyncio
+import contextlib
+import logging
+import os
+from typing import AsyncIterator, Dict, Optional, Tuple
 
+import orjson
 from fastapi import FastAPI, Query, Request, HTTPException
-from fastapi.responses import HTMLResponse, ORJSONResponse, PlainTextResponse, Response
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 from fastapi.templating import Jinja2Templates
+from watchfiles import awatch
 
 from app.config import get_settings
 from app.skos.graph import SKOSGraphService
 
 
 settings = get_settings()
+
+skos_service = SKOSGraphService(ttl_path=settings.data_ttl_path,
+                                default_language=settings.default_language,
+                                # The watcher reloads on change; requests only
+                                # check the mtime when it is off
+                                check_mtime=not settings.watch_data_file)
+
+logger = logging.getLogger(__name__)
+
+async def _watch_data_file(path: str, stop_event: asyncio.Event) -> None:
+    # Watch the directory rather than the file so editors and deploys that
+    # replace the file atomically are still picked up.
+    path = os.path.abspath(path)
+    async for _ in awatch(os.path.dirname(path), watch_filter=lambda _change, changed: changed == path,
+                          stop_event=stop_event, recursive=False):
+        # refresh skips the rebuild when the mtime has not moved, e.g. after
+        # /reload already picked the change up, and keeps the last good graph
+        # if the new file does not parse.
+        try:
+            await asyncio.to_thread(skos_service.refresh)
+        except Exception:
+            logger.exception("Failed to reload %s", path)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Parse and index before accepting traffic instead of on the first request
+    skos_service.refresh()
+    watcher = None
+    stop_watching = asyncio.Event()
+    if settings.watch_data_file and os.path.isdir(os.path.dirname(os.path.abspath(settings.data_ttl_path))):
+        watcher = asyncio.create_task(_watch_data_file(settings.data_ttl_path, stop_watching))
+    yield
+    # Let awatch return on its own; cancelling it leaves the notify thread
+    # running into interpreter shutdown.
+    stop_watching.set()
+    if watcher is not None:
+        await watcher
+
+
 app = FastAPI(title="Montessori Glossary - SKOS",
               version="0.1.0",
               docs_url="/api/docs",
-              redoc_url="/api/redoc")
+              redoc_url="/api/redoc",
+              lifespan=lifespan)
 
 templates = Jinja2Templates(directory="templates")
 
-skos_service = SKOSGraphService(ttl_path=settings.data_ttl_path,
-                                default_language=settings.default_language)
+# (iri, language) -> (detail the page was rendered from, rendered HTML). The
+# service hands out a new detail dict after a reload, so an identity check on
+# it is enough to invalidate stale pages.
+_concept_page_cache: Dict[Tuple[str, str], Tuple[dict, bytes]] = {}
 
 
 @app.get("/health")
@@ -39,37 +87,43 @@ async def index(request: Request, q: Optional[str] = Query(default=None, descrip
 
 
 @app.get("/concepts", response_class=ORJSONResponse)
-async def list_concepts(q: Optional[str] = Query(default=None), limit: int = 50, offset: int = 0) -> ORJSONResponse:
+async def list_concepts(q: Optional[str] = Query(default=None), limit: int = 50, offset: int = 0) -> Response:
+    # The service hands out plain dicts, which orjson encodes directly
     if q:
         results = skos_service.search_concepts(q, limit=limit)
-        return ORJSONResponse([r.__dict__ for r in results])
+        return Response(content=orjson.dumps(results), media_type="application/json")
     results, total = skos_service.list_concepts(limit=limit, offset=offset)
-    return ORJSONResponse({"total": total, "items": [r.__dict__ for r in results]})
+    return Response(content=orjson.dumps({"total": total, "items": results}), media_type="application/json")
 
 
-@app.get("/concepts/{iri_encoded}")
-async def get_concept(iri_encoded: str) -> ORJSONResponse:
-    iri = unquote(iri_encoded)
+# Starlette has already percent-decoded path parameters, and the `path`
+# converter lets the IRI keep its slashes, so it is looked up as-is.
+@app.get("/concepts/{iri:path}")
+async def get_concept(iri: str) -> ORJSONResponse:
     detail = skos_service.get_concept_detail(iri)
     if detail is None:
         raise HTTPException(status_code=404, detail="Concept not found")
     return ORJSONResponse(detail)
 
 
-@app.get("/c/{iri_encoded}", response_class=HTMLResponse)
-async def concept_page(request: Request, iri_encoded: str) -> HTMLResponse:
-    iri = unquote(iri_encoded)
-    detail = skos_service.get_concept_detail(iri)
+@app.get("/c/{iri:path}", response_class=HTMLResponse)
+async def concept_page(request: Request, iri: str) -> HTMLResponse:
+    language = settings.default_language
+    detail = skos_service.get_concept_detail(iri, language=language)
     if detail is None:
         raise HTTPException(status_code=404, detail="Concept not found")
-    return templates.TemplateResponse("concept.html", {"request": request, "concept": detail})
+    cached = _concept_page_cache.get((iri, language))
+    if cached is None or cached[0] is not detail:
+        html = templates.get_template("concept.html").render(request=request, concept=detail)
+        cached = _concept_page_cache[(iri, language)] = (detail, html.encode("utf-8"))
+    return HTMLResponse(content=cached[1])
 
 
 @app.get("/download.{fmt}")
 async def download_dataset(fmt: str) -> Response:
     try:
         data, content_type = skos_service.serialize(fmt)
-        return PlainTextResponse(content=data, media_type=content_type)
+        return Response(content=data, media_type=content_type)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
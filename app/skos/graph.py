@@ -1,156 +1,423 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Final, Iterable, List, NamedTuple, Optional, Set, Tuple
+from pathlib import Path
+import logging
 import os
 import threading
 
-from rdflib import Graph, URIRef, Namespace, Literal
-from rdflib.namespace import SKOS, RDF, DCTERMS
+import pyoxigraph as ox
+from oxrdflib import OxigraphStore
+from rdflib import Graph, Literal, URIRef, Namespace
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from rdflib.namespace import SKOS, RDF, DCTERMS, XSD
 
 
-@dataclass
-class ConceptSummary:
-    iri: str
-    pref_label: Optional[str]
-    definition: Optional[str]
+logger = logging.getLogger(__name__)
+
+# Resolved once; attribute access on rdflib namespaces is not free in hot loops
+RDF_TYPE: Final[URIRef] = RDF.type
+CONCEPT: Final[URIRef] = SKOS.Concept
+PREF_LABEL: Final[URIRef] = SKOS.prefLabel
+ALT_LABEL: Final[URIRef] = SKOS.altLabel
+DEFINITION: Final[URIRef] = SKOS.definition
+BROADER: Final[URIRef] = SKOS.broader
+NARROWER: Final[URIRef] = SKOS.narrower
+RELATED: Final[URIRef] = SKOS.related
+IN_SCHEME: Final[URIRef] = SKOS.inScheme
+NOTATION: Final[URIRef] = SKOS.notation
+
+
+# Keyed by oxigraph terms: the index is built straight from the native store
+_OX_RDF_TYPE: Final[ox.NamedNode] = ox.NamedNode(RDF_TYPE)
+_OX_CONCEPT: Final[ox.NamedNode] = ox.NamedNode(CONCEPT)
+
+_LITERAL_FIELDS: Dict[ox.NamedNode, str] = {
+    ox.NamedNode(PREF_LABEL): "prefLabel",
+    ox.NamedNode(ALT_LABEL): "altLabel",
+    ox.NamedNode(DEFINITION): "definition",
+}
+
+_RESOURCE_FIELDS: Dict[ox.NamedNode, str] = {
+    ox.NamedNode(BROADER): "broader",
+    ox.NamedNode(NARROWER): "narrower",
+    ox.NamedNode(RELATED): "related",
+    ox.NamedNode(IN_SCHEME): "inScheme",
+    ox.NamedNode(NOTATION): "notation",
+}
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i: i + 3] for i in range(len(text) - 2)}
+
+
+def _best_values(values: Dict[str, List[str]]) -> Dict[str, str]:
+    """Map each language to its first value, with "und" holding the fallback.
+
+    The fallback is the langless value if there is one, else the first value
+    of any language, so a lookup is `best.get(language)` then `best.get("und")`.
+    """
+    best = {lang: items[0] for lang, items in values.items()}
+    if "und" not in best:
+        for first in best.values():
+            best["und"] = first
+            break
+    return best
+
+
+class _GraphState(NamedTuple):
+    """Everything derived from one load of the TTL file, published as a unit."""
+
+    graph: Graph
+    mtime: Optional[float]
+    concepts: Dict[str, Dict]
+    concept_order: List[str]
+    total: int
+    # iri -> [(lang, label, casefolded label)], prefLabels first
+    label_index: Dict[str, List[Tuple[str, str, str]]]
+    # casefolded label trigram -> IRIs of concepts with a label containing it
+    trigram_index: Dict[str, Set[str]]
+    # iri -> _best_values of its prefLabels / definitions
+    best_labels: Dict[str, Dict[str, str]]
+    best_definitions: Dict[str, Dict[str, str]]
+    # language -> ready-made {iri, pref_label, definition} dicts in concept_order
+    summaries: Dict[str, List[Dict]]
+    # language -> iri -> the same summary dicts, for search results
+    summary_index: Dict[str, Dict[str, Dict]]
+    # (iri, language) -> assembled get_concept_detail result
+    detail_cache: Dict[Tuple[str, str], Dict]
+    # format -> (serialized bytes, content type)
+    serialize_cache: Dict[str, Tuple[bytes, str]]
 
 
 class SKOSGraphService:
-    def __init__(self, ttl_path: str, default_language: str = "en") -> None:
+    def __init__(self, ttl_path: str, default_language: str = "en", check_mtime: bool = True) -> None:
         self._ttl_path = ttl_path
-        self._default_language = default_language
+        # Off when something else (the app's file watcher) triggers reloads,
+        # so requests never stat the file or parse it themselves
+        self._check_mtime = check_mtime
+        # oxigraph lowercases language tags, and tags are case-insensitive,
+        # so requested languages are lowercased before any lookup
+        self._default_language = default_language.lower()
+        # Serializes rebuilds only; readers never wait on it once a state exists
         self._graph_lock = threading.Lock()
-        self._graph: Optional[Graph] = None
-        self._last_loaded_mtime: Optional[float] = None
+        self._state: Optional[_GraphState] = None
+        # mtime of a file version that failed to parse, so it is not retried
+        # on every request while the last good state keeps being served
+        self._failed_mtime: Optional[float] = None
 
-    def _ensure_loaded(self) -> None:
-        with self._graph_lock:
-            mtime = None
-            try:
-                mtime = os.path.getmtime(self._ttl_path)
-            except FileNotFoundError:
-                pass
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self._ttl_path)
+        except FileNotFoundError:
+            return None
+
+    def _ensure_loaded(self) -> _GraphState:
+        # Fast path without the lock: rebinding _state is atomic, so a reader
+        # sees either the previous or the new state, never a mix of both.
+        state = self._state
+        if state is not None and not self._check_mtime:
+            return state
+        return self._refresh()
+
+    def _refresh(self) -> _GraphState:
+        state = self._state
+        mtime = self._current_mtime()
+        if state is not None and (state.mtime == mtime or self._is_failed(mtime)):
+            return state
 
-            if self._graph is not None and self._last_loaded_mtime == mtime:
-                return
+        if state is None:
+            self._graph_lock.acquire()
+        elif not self._graph_lock.acquire(blocking=False):
+            # Someone else is already rebuilding; keep serving the current
+            # state instead of queueing behind the parse.
+            return state
+        try:
+            state = self._state
+            mtime = self._current_mtime()
+            if state is None:
+                state = self._state = self._load(mtime)
+            elif state.mtime != mtime and not self._is_failed(mtime):
+                try:
+                    state = self._state = self._load(mtime)
+                except Exception:
+                    self._failed_mtime = mtime
+                    logger.exception("Failed to load %s; keeping the previous graph", self._ttl_path)
+            return state
+        finally:
+            self._graph_lock.release()
 
-            g = Graph()
-            if os.path.exists(self._ttl_path):
-                g.parse(self._ttl_path, format="turtle")
-            self._graph = g
-            self._last_loaded_mtime = mtime
+    def _is_failed(self, mtime: Optional[float]) -> bool:
+        # A missing file also reports None, so only compare once a parse has
+        # actually failed
+        return self._failed_mtime is not None and self._failed_mtime == mtime
+
+    def _load(self, mtime: Optional[float]) -> _GraphState:
+        store = ox.Store()
+        g = Graph(store=OxigraphStore(store=store), identifier=DATASET_DEFAULT_GRAPH_ID)
+        if os.path.exists(self._ttl_path):
+            # Stream straight into the oxigraph store with its native
+            # parser; bulk loading skips per-quad transactions. The parser is
+            # driven directly so the file's prefixes can be bound afterwards
+            # for the Turtle and RDF/XML downloads.
+            parser = ox.parse(path=self._ttl_path, format=ox.RdfFormat.TURTLE,
+                              base_iri=Path(self._ttl_path).absolute().as_uri())
+            store.bulk_extend(parser)
+            for prefix, namespace in parser.prefixes.items():
+                g.bind(prefix, namespace, replace=True)
+        concepts, concept_order, label_index, trigram_index = self._build_index(store)
+        best_labels = {iri: _best_values(concept["prefLabel"]) for iri, concept in concepts.items()}
+        best_definitions = {iri: _best_values(concept["definition"]) for iri, concept in concepts.items()}
+        summaries = self._build_summaries(concept_order, best_labels, best_definitions)
+        return _GraphState(
+            graph=g,
+            mtime=mtime,
+            concepts=concepts,
+            concept_order=concept_order,
+            total=len(concept_order),
+            label_index=label_index,
+            trigram_index=trigram_index,
+            best_labels=best_labels,
+            best_definitions=best_definitions,
+            summaries=summaries,
+            summary_index={language: {item["iri"]: item for item in items} for language, items in summaries.items()},
+            detail_cache={},
+            serialize_cache={},
+        )
+
+    def _build_index(self, store: ox.Store) -> Tuple[Dict[str, Dict], List[str], Dict[str, List[Tuple[str, str, str]]], Dict[str, Set[str]]]:
+        """Collect everything the query helpers need straight from the oxigraph store.
+
+        Each field is read with its own bound-predicate pattern, so oxigraph
+        answers it from the matching index and rdflib's dispatch and term
+        conversion are skipped entirely. The store only ever holds this
+        graph, so no graph name filter is needed.
+        """
+        concept_iris = {q.subject.value for q in store.quads_for_pattern(None, _OX_RDF_TYPE, _OX_CONCEPT)}
+        fields: Dict[str, Dict] = {}
+        for predicate, key in _LITERAL_FIELDS.items():
+            for s, _, o, _ in store.quads_for_pattern(None, predicate, None):
+                if isinstance(o, ox.Literal):
+                    entry = fields.get(s.value)
+                    if entry is None:
+                        entry = fields[s.value] = {}
+                    values = entry.get(key)
+                    if values is None:
+                        values = entry[key] = {}
+                    lang = o.language or "und"
+                    if lang in values:
+                        values[lang].append(o.value)
+                    else:
+                        values[lang] = [o.value]
+        for predicate, key in _RESOURCE_FIELDS.items():
+            for s, _, o, _ in store.quads_for_pattern(None, predicate, None):
+                entry = fields.get(s.value)
+                if entry is None:
+                    entry = fields[s.value] = {}
+                if key in entry:
+                    entry[key].append(o.value)
+                else:
+                    entry[key] = [o.value]
+
+        concepts: Dict[str, Dict] = {}
+        label_index: Dict[str, List[Tuple[str, str, str]]] = {}
+        trigram_index: Dict[str, Set[str]] = {}
+        concept_order = sorted(concept_iris)
+        for iri in concept_order:
+            entry = fields.get(iri, {})
+            concept: Dict = {"iri": iri}
+            for key in _LITERAL_FIELDS.values():
+                concept[key] = entry.get(key, {})
+            for key in _RESOURCE_FIELDS.values():
+                concept[key] = entry.get(key, [])
+            concepts[iri] = concept
+            labels_for_iri = label_index[iri] = []
+            for key in ("prefLabel", "altLabel"):
+                for lang, labels in concept[key].items():
+                    for label in labels:
+                        folded_label = label.casefold()
+                        labels_for_iri.append((lang, label, folded_label))
+                        for trigram in _trigrams(folded_label):
+                            posting = trigram_index.get(trigram)
+                            if posting is None:
+                                trigram_index[trigram] = {iri}
+                            else:
+                                posting.add(iri)
+        return concepts, concept_order, label_index, trigram_index
+
+    def _build_summaries(self, concept_order: List[str], best_labels: Dict[str, Dict[str, str]],
+                         best_definitions: Dict[str, Dict[str, str]]) -> Dict[str, List[Dict]]:
+        # Languages without any label resolve exactly like "und" (langless, then
+        # first available), so that list doubles as the fallback.
+        languages = {self._default_language, "und"}
+        for iri in concept_order:
+            languages.update(best_labels[iri])
+            languages.update(best_definitions[iri])
+
+        summaries: Dict[str, List[Dict]] = {}
+        for language in languages:
+            summaries[language] = [
+                {
+                    "iri": iri,
+                    "pref_label": self._select_lang_value(best_labels[iri], language),
+                    "definition": self._select_lang_value(best_definitions[iri], language),
+                }
+                for iri in concept_order
+            ]
+        return summaries
 
     def reload(self) -> None:
+        # Build the replacement before publishing it so readers are never
+        # left without a state while the file is parsed.
         with self._graph_lock:
-            self._graph = None
-            self._last_loaded_mtime = None
-        self._ensure_loaded()
+            self._state = self._load(self._current_mtime())
+
+    def refresh(self) -> None:
+        """Load the data file if it is new or changed since the last load.
+
+        Unlike reload(), an unchanged mtime is a no-op, and a file that fails
+        to parse is logged while the previous graph keeps being served.
+        """
+        self._refresh()
 
     def get_graph(self) -> Graph:
-        self._ensure_loaded()
-        assert self._graph is not None
-        return self._graph
+        return self._ensure_loaded().graph
 
     # Query helpers
-    def list_concepts(self, limit: int = 100, offset: int = 0, language: Optional[str] = None) -> Tuple[List[ConceptSummary], int]:
-        g = self.get_graph()
-        language = language or self._default_language
-        concepts: List[ConceptSummary] = []
-
-        all_concepts = list(g.subjects(RDF.type, SKOS.Concept))
-        total = len(all_concepts)
-        for subject in all_concepts[offset: offset + limit]:
-            pref_label = self._get_best_label(g, subject, language)
-            definition = self._get_best_definition(g, subject, language)
-            concepts.append(ConceptSummary(iri=str(subject), pref_label=pref_label, definition=definition))
-        return concepts, total
-
-    def search_concepts(self, query: str, limit: int = 50, language: Optional[str] = None) -> List[ConceptSummary]:
-        g = self.get_graph()
-        language = language or self._default_language
-        lower_q = query.lower()
-        results: List[ConceptSummary] = []
-
-        for subject in g.subjects(RDF.type, SKOS.Concept):
-            labels = list(g.objects(subject, SKOS.prefLabel)) + list(g.objects(subject, SKOS.altLabel))
-            matched_label: Optional[str] = None
-            for label in labels:
-                if isinstance(label, Literal):
-                    if label.language is None or label.language == language:
-                        label_text = str(label)
-                        if lower_q in label_text.lower():
-                            matched_label = label_text
-                            break
-            if matched_label is not None:
-                definition = self._get_best_definition(g, subject, language)
-                results.append(ConceptSummary(iri=str(subject), pref_label=matched_label, definition=definition))
-            if len(results) >= limit:
-                break
+    def list_concepts(self, limit: int = 100, offset: int = 0, language: Optional[str] = None) -> Tuple[List[Dict], int]:
+        """Return a page of concept summaries and the total concept count.
+
+        The summary dicts are shared with the cache and must not be mutated.
+        """
+        state = self._ensure_loaded()
+        summaries = state.summaries
+        language = (language or self._default_language).lower()
+        items = summaries.get(language) or summaries["und"]
+        return items[offset: offset + limit], state.total
+
+    def search_concepts(self, query: str, limit: int = 50, language: Optional[str] = None) -> List[Dict]:
+        """Return summaries of concepts with a label containing `query`.
+
+        Same dicts as list_concepts, except that pref_label is the label that
+        matched; the shared ones must not be mutated.
+        """
+        state = self._ensure_loaded()
+        language = (language or self._default_language).lower()
+        summary_index = state.summary_index
+        summary_index = summary_index.get(language) or summary_index["und"]
+        folded_q = query.casefold()
+        results: List[Dict] = []
+
+        if limit <= 0:
+            return results
+        label_index = state.label_index
+        candidates: Iterable[str]
+        if len(folded_q) < 3:
+            candidates = label_index
+        else:
+            # Every trigram of the query must occur in a matching label, so
+            # only concepts present in all postings need to be checked.
+            postings = []
+            for trigram in _trigrams(folded_q):
+                posting = state.trigram_index.get(trigram)
+                if not posting:
+                    return results
+                postings.append(posting)
+            postings.sort(key=len)
+            matches = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+            concept_order = state.concept_order
+            if len(matches) ** 2 > limit * len(concept_order):
+                # Dense matches: walking the listing order reaches `limit`
+                # hits sooner than sorting every candidate would.
+                candidates = (iri for iri in concept_order if iri in matches)
+            else:
+                # concept_order is sorted by IRI, so this keeps the listing order
+                candidates = sorted(matches)
+
+        for iri in candidates:
+            # A label in the requested language wins over an untagged one,
+            # whatever order the store returned them in.
+            match = None
+            for lang, label, folded_label in label_index[iri]:
+                if lang == language:
+                    if folded_q in folded_label:
+                        match = label
+                        break
+                elif lang == "und" and match is None and folded_q in folded_label:
+                    match = label
+            if match is not None:
+                summary = summary_index[iri]
+                if summary["pref_label"] != match:
+                    summary = {"iri": iri, "pref_label": match, "definition": summary["definition"]}
+                results.append(summary)
+                if len(results) >= limit:
+                    break
         return results
 
     def get_concept_detail(self, iri: str, language: Optional[str] = None) -> Optional[Dict]:
-        g = self.get_graph()
-        language = language or self._default_language
-        subject = URIRef(iri)
-        if (subject, RDF.type, SKOS.Concept) not in g:
+        """Return the concept's fields plus its best label and definition.
+
+        Results are cached until the next reload and must not be mutated.
+        """
+        state = self._ensure_loaded()
+        language = (language or self._default_language).lower()
+        detail_cache = state.detail_cache
+        detail = detail_cache.get((iri, language))
+        if detail is not None:
+            return detail
+        concept = state.concepts.get(iri)
+        if concept is None:
             return None
 
-        detail: Dict = {"iri": iri}
-        detail["prefLabel"] = self._get_literals(g, subject, SKOS.prefLabel)
-        detail["altLabel"] = self._get_literals(g, subject, SKOS.altLabel)
-        detail["definition"] = self._get_literals(g, subject, SKOS.definition)
-        detail["broader"] = [str(o) for o in g.objects(subject, SKOS.broader)]
-        detail["narrower"] = [str(o) for o in g.objects(subject, SKOS.narrower)]
-        detail["related"] = [str(o) for o in g.objects(subject, SKOS.related)]
-        detail["inScheme"] = [str(o) for o in g.objects(subject, SKOS.inScheme)]
-        detail["notation"] = [str(o) for o in g.objects(subject, SKOS.notation)]
-
-        detail["bestPrefLabel"] = self._get_best_label(g, subject, language)
-        detail["bestDefinition"] = self._get_best_definition(g, subject, language)
+        detail = dict(concept)
+        detail["bestPrefLabel"] = self._select_lang_value(state.best_labels[iri], language)
+        detail["bestDefinition"] = self._select_lang_value(state.best_definitions[iri], language)
+        detail_cache[(iri, language)] = detail
         return detail
 
-    def serialize(self, format: str = "turtle") -> Tuple[str, str]:
-        g = self.get_graph()
+    def serialize(self, format: str = "turtle") -> Tuple[bytes, str]:
+        state = self._ensure_loaded()
         fmt = format.lower()
+        # JSON-LD and N-Triples have no prefixes or pretty layout to preserve,
+        # so they are dumped natively by oxigraph instead of rdflib's far
+        # slower Python serializers.
         if fmt in {"ttl", "turtle"}:
-            return g.serialize(format="turtle"), "text/turtle"
-        if fmt in {"jsonld", "json-ld"}:
-            return g.serialize(format="json-ld", indent=2), "application/ld+json"
-        if fmt in {"xml", "rdf", "rdfxml", "rdf/xml"}:
-            return g.serialize(format="xml"), "application/rdf+xml"
-        if fmt in {"nt", "ntriples", "n-triples"}:
-            return g.serialize(format="nt"), "application/n-triples"
-        raise ValueError(f"Unsupported format: {format}")
+            rdf_format, content_type = "turtle", "text/turtle"
+        elif fmt in {"jsonld", "json-ld"}:
+            rdf_format, content_type = "ox-json-ld", "application/ld+json"
+        elif fmt in {"xml", "rdf", "rdfxml", "rdf/xml"}:
+            rdf_format, content_type = "xml", "application/rdf+xml"
+        elif fmt in {"nt", "ntriples", "n-triples"}:
+            rdf_format, content_type = "ox-nt", "application/n-triples"
+        else:
+            raise ValueError(f"Unsupported format: {format}")
+
+        # The data only changes on reload, so render each format once per state
+        cached = state.serialize_cache.get(rdf_format)
+        if cached is not None:
+            return cached
+        graph = state.graph if rdf_format.startswith("ox-") else self._plain_graph(state.graph)
+        data = graph.serialize(format=rdf_format, encoding="utf-8")
+        state.serialize_cache[rdf_format] = (data, content_type)
+        return data, content_type
 
     # Internal helpers
-    def _get_best_label(self, g: Graph, subject: URIRef, language: str) -> Optional[str]:
-        labels = list(g.objects(subject, SKOS.prefLabel))
-        label = self._select_lang_literal(labels, language)
-        return str(label) if label is not None else None
-
-    def _get_best_definition(self, g: Graph, subject: URIRef, language: str) -> Optional[str]:
-        defs = list(g.objects(subject, SKOS.definition))
-        lit = self._select_lang_literal(defs, language)
-        return str(lit) if lit is not None else None
-
-    def _get_literals(self, g: Graph, subject: URIRef, predicate: URIRef) -> Dict[str, List[str]]:
-        values: Dict[str, List[str]] = {}
-        for lit in g.objects(subject, predicate):
-            if isinstance(lit, Literal):
-                lang = lit.language or "und"
-                values.setdefault(lang, []).append(str(lit))
-        return values
-
-    def _select_lang_literal(self, literals: List[Literal], language: str) -> Optional[Literal]:
-        best_exact: Optional[Literal] = None
-        best_langless: Optional[Literal] = None
-        for lit in literals:
-            if not isinstance(lit, Literal):
-                continue
-            if lit.language == language:
-                best_exact = lit
-                break
-            if lit.language is None:
-                best_langless = lit
-        return best_exact or best_langless or (literals[0] if literals else None)
\ No newline at end of file
+    def _plain_graph(self, g: Graph) -> Graph:
+        """Copy the graph into rdflib's memory store for its own serializers.
+
+        oxigraph gives every untagged literal the xsd:string datatype, which
+        rdflib would write out as ^^xsd:string; those are made plain again so
+        the download matches the source file.
+        """
+        plain = Graph()
+        for prefix, namespace in g.namespaces():
+            plain.bind(prefix, namespace, replace=True)
+        plain.addN(
+            (s, p, Literal(str(o)) if type(o) is Literal and o.datatype == XSD.string else o, plain)
+            for s, p, o in g
+        )
+        return plain
+
+    def _select_lang_value(self, best: Dict[str, str], language: str) -> Optional[str]:
+        value = best.get(language)
+        return value if value is not None else best.get("und")
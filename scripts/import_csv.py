@@ -4,48 +4,81 @@ from __future__ import annotations
 import argparse
 import csv
 import os
+import tempfile
+from typing import Final
 from urllib.parse import quote
 
-from rdflib import Graph, Namespace, URIRef, Literal
+from pyoxigraph import DefaultGraph, RdfFormat, Store
 from rdflib.namespace import SKOS, DCTERMS, RDF
 
 
 DEFAULT_BASE_IRI = os.getenv("BASE_IRI", "https://vocabulary.montessoriglossary.org/")
 
+# Predicates and classes pre-rendered as N-Triples terms
+RDF_TYPE: Final[str] = f"<{RDF.type}>"
+CONCEPT: Final[str] = f"<{SKOS.Concept}>"
+CONCEPT_SCHEME: Final[str] = f"<{SKOS.ConceptScheme}>"
+IN_SCHEME: Final[str] = f"<{SKOS.inScheme}>"
+PREF_LABEL: Final[str] = f"<{SKOS.prefLabel}>"
+ALT_LABEL: Final[str] = f"<{SKOS.altLabel}>"
+DEFINITION: Final[str] = f"<{SKOS.definition}>"
+TITLE: Final[str] = f"<{DCTERMS.title}>"
+
+PREFIXES: Final[dict] = {"dcterms": str(DCTERMS), "skos": str(SKOS)}
+
+_NT_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"})
+
 
 def slugify(value: str) -> str:
 	return quote(value.strip().lower().replace(" ", "-"), safe="")
 
 
+def nt_literal(value: str, language: str) -> str:
+	return f'"{value.translate(_NT_ESCAPES)}"@{language}'
+
+
 def import_csv_to_skos(input_csv: str, output_ttl: str, base_iri: str = DEFAULT_BASE_IRI, language: str = "en") -> None:
-	g = Graph()
-	scheme = URIRef(base_iri.rstrip("/") + "/scheme")
-	g.add((scheme, RDF.type, SKOS.ConceptScheme))
-	g.add((scheme, DCTERMS.title, Literal("Montessori Glossary Vocabulary", lang=language)))
-
-	with open(input_csv, newline="", encoding="utf-8") as f:
-		reader = csv.DictReader(f)
-		for row in reader:
-			label = (row.get("prefLabel") or row.get("label") or row.get("term") or "").strip()
-			if not label:
-				continue
-			slug = row.get("id") or slugify(label)
-			iri = URIRef(base_iri.rstrip("/") + f"/concept/{slug}")
-			g.add((iri, RDF.type, SKOS.Concept))
-			g.add((iri, SKOS.inScheme, scheme))
-			g.add((iri, SKOS.prefLabel, Literal(label, lang=language)))
-
-			definition = (row.get("definition") or row.get("desc") or "").strip()
-			if definition:
-				g.add((iri, SKOS.definition, Literal(definition, lang=language)))
-
-			alt = (row.get("altLabel") or row.get("alt") or "").strip()
-			if alt:
-				for alt_item in [a.strip() for a in alt.split("|") if a.strip()]:
-					g.add((iri, SKOS.altLabel, Literal(alt_item, lang=language)))
-
-	g.serialize(destination=output_ttl, format="turtle")
-	print(f"Wrote SKOS TTL to {output_ttl} with {len(list(g.subjects(RDF.type, SKOS.Concept)))} concepts")
+	# Stream rows out as N-Triples and let oxigraph parse and re-serialize them,
+	# rather than building an in-memory rdflib graph term by term.
+	base = base_iri.rstrip("/")
+	scheme = f"<{base}/scheme>"
+	concept_prefix = f"<{base}/concept/"
+	concept_iris = set()
+	fd, nt_path = tempfile.mkstemp(suffix=".nt")
+	try:
+		with os.fdopen(fd, "w", encoding="utf-8") as out:
+			out.write(f"{scheme} {RDF_TYPE} {CONCEPT_SCHEME} .\n")
+			out.write(f"{scheme} {TITLE} {nt_literal('Montessori Glossary Vocabulary', language)} .\n")
+
+			with open(input_csv, newline="", encoding="utf-8") as f:
+				reader = csv.DictReader(f)
+				for row in reader:
+					label = (row.get("prefLabel") or row.get("label") or row.get("term") or "").strip()
+					if not label:
+						continue
+					slug = row.get("id") or slugify(label)
+					iri = f"{concept_prefix}{slug}>"
+					out.write(f"{iri} {RDF_TYPE} {CONCEPT} .\n")
+					out.write(f"{iri} {IN_SCHEME} {scheme} .\n")
+					out.write(f"{iri} {PREF_LABEL} {nt_literal(label, language)} .\n")
+					concept_iris.add(iri)
+
+					definition = (row.get("definition") or row.get("desc") or "").strip()
+					if definition:
+						out.write(f"{iri} {DEFINITION} {nt_literal(definition, language)} .\n")
+
+					alt = (row.get("altLabel") or row.get("alt") or "").strip()
+					if alt:
+						for alt_item in [a.strip() for a in alt.split("|") if a.strip()]:
+							out.write(f"{iri} {ALT_LABEL} {nt_literal(alt_item, language)} .\n")
+
+		store = Store()
+		store.bulk_load(path=nt_path, format=RdfFormat.N_TRIPLES)
+	finally:
+		os.remove(nt_path)
+
+	store.dump(output_ttl, format=RdfFormat.TURTLE, from_graph=DefaultGraph(), prefixes=PREFIXES)
+	print(f"Wrote SKOS TTL to {output_ttl} with {len(concept_iris)} concepts")
 
 
 if __name__ == "__main__":